@@ -1,6 +1,11 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 import math
+import os
 from pathlib import Path
 from datetime import datetime
 
@@ -10,81 +15,352 @@ st.set_page_config(
     page_icon=":earth_americas:",
 )
 
+# -----------------------------------------------------------------------------
+# Textes statiques de l'application (définis une seule fois au niveau du module)
+
+DESCRIPTION_MD = """
+    # :earth_americas: Tableau de bord de la croissance du PIB mondial
+    **Créé par RENE TOLNO**
+
+Plongez dans l'analyse des données du PIB grâce aux données ouvertes de la [Banque Mondiale](https://data.worldbank.org/). Cette application, conçue avec une approche basée sur la science des données, permet d'explorer et de visualiser les tendances économiques mondiales.
+
+Les principales Fonctionnalités :
+
+✅ Sélection dynamique de la plage d’années selon les données disponibles.
+
+✅ Choix des pays à comparer pour une analyse ciblée.
+
+✅ Personnalisation avancée des graphiques : affichage en valeur absolue ou en indice (base 100).
+
+✅ Indicateurs clés : PIB en milliards de dollars et taux de croissance annuel moyen (CAGR).
+
+Idéal pour les économistes, analystes et passionnés de data science souhaitant extraire des insights pertinents sur l’évolution économique mondiale. 🚀📊
+
+**Copyright 2025** - Données de la Banque Mondiale
+    """
+
+ABOUT_MD = """
+        **Tableau de bord du PIB**  
+        Créé par **RENE TOLNO**
+
+        Cette application permet d'explorer les données du PIB issues du [World Bank Open Data](https://data.worldbank.org/).  
+        Vous pouvez :
+        - Sélectionner la plage d'années (déduite automatiquement des données disponibles).
+        - Choisir les pays à afficher.
+        - Personnaliser l'affichage du graphique (type et mode : valeur absolue ou indice avec base 100).
+        - Visualiser des indicateurs de performance, notamment le PIB en dollars et le taux de croissance annuel moyen (CAGR).
+
+        **Notes** :  
+        - Les montants sont affichés en dollars américains.  
+        - Les valeurs du PIB sont converties en milliards pour une lecture simplifiée.
+
+        **Tous droits reservés** - Données de la Banque Mondiale
+        """
+
+# -----------------------------------------------------------------------------
+# Continent de chaque pays (données fictives à ajuster selon la source)
+
+CONTINENT_MAP = {
+    "DEU": "Europe", "FRA": "Europe", "GBR": "Europe", "BRA": "Amérique du Sud", "MEX": "Amérique du Nord",
+    "JPN": "Asie", "USA": "Amérique du Nord", "CHN": "Asie", "IND": "Asie", "ITA": "Europe", 
+    "ARG": "Amérique du Sud", "CAN": "Amérique du Nord", "AUS": "Océanie", "RUS": "Europe", "ESP": "Europe", 
+    "NGA": "Afrique", "SAU": "Asie", "EGY": "Afrique", "KOR": "Asie", "TUR": "Europe", "COL": "Amérique du Sud",
+    # Vous devez ajouter ici **tous les pays du monde** avec leur continent. Vous pouvez récupérer cette information de la base de données de la Banque Mondiale.
+}
+
 # -----------------------------------------------------------------------------
 # Définition des fonctions utiles
 
+@st.cache_resource
+def load_gdp_table():
+    """
+    Charge la table Arrow brute du PIB (une ligne par pays, une colonne par année).
+
+    La table est partagée par toutes les sessions du processus : elle est lue
+    une seule fois, depuis la copie Parquet si elle est à jour, sinon depuis
+    le CSV (la copie Parquet est alors régénérée).
+    """
+    DATA_FILENAME = Path(__file__).parent / "data/gdp_data.csv"
+    PARQUET_FILENAME = DATA_FILENAME.with_suffix(".parquet")
+
+    # Détermination dynamique des colonnes correspondant aux années
+    # (lecture de l'en-tête seul, sans parser les données). Les années 2023,
+    # 2024 et 2025 sont exclues dès la lecture : elles ne sont jamais parsées.
+    header = pd.read_csv(DATA_FILENAME, nrows=0).columns
+    year_columns = [
+        col for col in header[header.str.fullmatch(r"\d{4}", na=False)] if int(col) < 2023
+    ]
+    columns = ["Country Code", "Country Name", *year_columns]
+
+    if PARQUET_FILENAME.exists() and PARQUET_FILENAME.stat().st_mtime >= DATA_FILENAME.stat().st_mtime:
+        # Copie Parquet à jour : lecture projetée en mémoire, sans parsing texte
+        # (si elle est illisible, on retombe sur le CSV, qui la régénère)
+        try:
+            return pq.read_table(PARQUET_FILENAME, columns=columns, memory_map=True)
+        except (pa.ArrowInvalid, OSError):
+            pass
+
+    # Lecture directe en table Arrow (parseur multi-thread), limitée aux
+    # colonnes utiles et avec des types explicites pour éviter l'inférence
+    # de type colonne par colonne
+    column_types = {
+        "Country Code": pa.string(),
+        "Country Name": pa.string(),
+        **{col: pa.float64() for col in year_columns},
+    }
+    gdp_table = pacsv.read_csv(
+        DATA_FILENAME,
+        convert_options=pacsv.ConvertOptions(include_columns=columns, column_types=column_types),
+    )
+
+    # Conversion unique en Parquet pour les démarrages suivants (ignorée si le
+    # dossier de données n'est pas accessible en écriture). Le fichier est écrit
+    # à côté puis renommé : une écriture interrompue ne laisse jamais de copie
+    # tronquée, et deux processus démarrant ensemble ne se gênent pas.
+    tmp_filename = PARQUET_FILENAME.with_name(f"{PARQUET_FILENAME.name}.{os.getpid()}.tmp")
+    try:
+        pq.write_table(gdp_table, tmp_filename, compression="zstd")
+        os.replace(tmp_filename, PARQUET_FILENAME)
+    except OSError:
+        tmp_filename.unlink(missing_ok=True)
+
+    return gdp_table
+
 @st.cache_data
-def get_gdp_data():
+def get_gdp_data(continent_map):
     """
-    Récupère les données du PIB à partir d'un fichier CSV et les transforme.
+    Récupère les données du PIB (table chargée par load_gdp_table) et les transforme.
 
     Les colonnes d'années sont pivotées pour obtenir trois colonnes : 
     - Country Code
     - Année
     - PIB
     Les années disponibles sont déterminées dynamiquement en fonction du CSV.
-    """
-    DATA_FILENAME = Path(__file__).parent / "data/gdp_data.csv"
-    raw_gdp_df = pd.read_csv(DATA_FILENAME)
 
-    # Détermination dynamique des colonnes correspondant aux années
-    year_columns = [col for col in raw_gdp_df.columns if col.isdigit()]
-    MIN_YEAR = int(min(year_columns))
-    MAX_YEAR = int(max(year_columns))
-
-    # Exclusion des années 2023, 2024 et 2025
-    year_columns = [col for col in year_columns if int(col) < 2023]
-
-    # Transformation des données (pivot des colonnes d'années)
-    gdp_df = raw_gdp_df.melt(
-        id_vars=["Country Code", "Country Name"],
-        value_vars=year_columns,
-        var_name="Année",
-        value_name="PIB",
+    Renvoie aussi, pour des accès directs sans parcourir le tableau long :
+    - une matrice dense (pays × années) des PIB et l'index de ligne de chaque pays
+    - la première et la dernière année disponibles (lues sur les noms de colonnes)
+    - le tableau large (index = Année, colonnes = Country Code) des graphiques
+    - le nom et le continent de chaque pays, indexés par son code
+
+    La table des continents est passée en argument (et donc hachée par
+    Streamlit) : toute modification de CONTINENT_MAP invalide le cache.
+    """
+    raw_gdp_df = load_gdp_table().to_pandas(types_mapper=pd.ArrowDtype)
+
+    # Détermination dynamique des colonnes correspondant aux années : une
+    # seule conversion numérique de l'en-tête (index = nom de colonne)
+    column_years = pd.to_numeric(raw_gdp_df.columns.to_series(), errors="coerce").dropna()
+    MIN_YEAR = int(column_years.min())
+    MAX_YEAR = int(column_years.max())
+
+    column_years = column_years.sort_values()
+    year_columns = column_years.index.tolist()
+
+    # Transformation des données (pivot des colonnes d'années) : le bloc 2-D
+    # (pays × années) est aplati directement, sans passer par melt.
+    # Le PIB est stocké en float32 (7 chiffres significatifs suffisent) et
+    # l'année en int16, ce qui divise par deux le volume de données manipulé.
+    pib_values = raw_gdp_df[year_columns].to_numpy(dtype=np.float32)
+    years = column_years.to_numpy(dtype=np.int16)
+    n_years = len(years)
+    # Les lignes sont groupées par pays (dans l'ordre du CSV) puis triées par
+    # année : chaque pays occupe un bloc contigu de n_years lignes. Les colonnes
+    # textuelles sont catégorielles : chaque libellé n'est stocké qu'une fois.
+    country_rows = np.repeat(np.arange(len(raw_gdp_df)), n_years)
+    gdp_df = pd.DataFrame({
+        "Country Code": pd.Categorical.from_codes(country_rows, categories=raw_gdp_df["Country Code"]),
+        "Country Name": pd.Categorical(raw_gdp_df["Country Name"])[country_rows],
+        "Année": np.tile(years, len(raw_gdp_df)),
+        "PIB": pib_values.ravel(),
+    })
+
+    # Ajout du continent de chaque pays : jointure par code pays sur la table
+    # des continents (une fois par pays), puis recopie sur les lignes de chaque
+    # pays à partir des codes catégoriels
+    continent_tbl = pd.Series(continent_map, name="Continent", dtype="category").rename_axis("Country Code")
+    continents = continent_tbl.reindex(pd.Index(raw_gdp_df["Country Code"], name="Country Code"))
+    gdp_df["Continent"] = continents.array[country_rows]
+
+    # Table d'accès direct : pib_matrix[code_to_row[pays], année - min_year]
+    code_to_row = {code: row for row, code in enumerate(raw_gdp_df["Country Code"])}
+
+    # Tableau large (années × pays), déjà présent dans le CSV : inutile de le
+    # reconstruire par pivot à chaque interaction
+    wide_df = pd.DataFrame(
+        pib_values.T,
+        index=pd.Index(years, name="Année"),
+        columns=pd.Index(raw_gdp_df["Country Code"], name="Country Code"),
     )
 
-    # Conversion de la colonne Année en entier
-    gdp_df["Année"] = pd.to_numeric(gdp_df["Année"])
+    # Nom de chaque pays, lu sur la table d'origine (une ligne par pays)
+    countries_dict = dict(zip(raw_gdp_df["Country Code"], raw_gdp_df["Country Name"]))
 
-    # Ajouter les continents pour chaque pays (données fictives à ajuster selon la source)
-    continent_map = {
-        "DEU": "Europe", "FRA": "Europe", "GBR": "Europe", "BRA": "Amérique du Sud", "MEX": "Amérique du Nord",
-        "JPN": "Asie", "USA": "Amérique du Nord", "CHN": "Asie", "IND": "Asie", "ITA": "Europe", 
-        "ARG": "Amérique du Sud", "CAN": "Amérique du Nord", "AUS": "Océanie", "RUS": "Europe", "ESP": "Europe", 
-        "NGA": "Afrique", "SAU": "Asie", "EGY": "Afrique", "KOR": "Asie", "TUR": "Europe", "COL": "Amérique du Sud",
-        # Vous devez ajouter ici **tous les pays du monde** avec leur continent. Vous pouvez récupérer cette information de la base de données de la Banque Mondiale.
-    }
-    gdp_df["Continent"] = gdp_df["Country Code"].map(continent_map)
+    return gdp_df, pib_values, code_to_row, MIN_YEAR, MAX_YEAR, wide_df, countries_dict, continents
 
-    return gdp_df
+# Nombre maximal de points tracés par pays : au-delà, les séries sont
+# sous-échantillonnées côté serveur avant d'être envoyées au navigateur
+MAX_CHART_POINTS = 500
 
-df_pib = get_gdp_data()
+def lttb_indices(x, y, n_out):
+    """
+    Renvoie les indices des points conservés par l'algorithme LTTB
+    (Largest-Triangle-Three-Buckets, Steinarsson 2013).
 
-# -----------------------------------------------------------------------------
-# Titre et description de l'application
+    Le premier et le dernier point sont toujours conservés ; les points
+    intérieurs sont répartis en n_out - 2 seaux, dans chacun desquels on garde
+    le point formant le plus grand triangle avec le point retenu précédemment
+    et la moyenne du seau suivant. x et y ne doivent pas contenir de NaN.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    kept = np.empty(n_out, dtype=np.intp)
+    kept[0], kept[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i < n_out - 3:
+            avg_x = x[end:edges[i + 2]].mean()
+            avg_y = y[end:edges[i + 2]].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+
+        # Double de l'aire des triangles (a, point candidat, moyenne suivante)
+        areas = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        kept[i + 1] = a
+
+    return kept
+
+@st.cache_resource
+def get_lttb_kernel():
+    """
+    Renvoie lttb_indices compilée par Numba, une seule fois par processus
+    (et non à chaque réexécution du script), ou la version NumPy si Numba
+    n'est pas installé.
 
-st.markdown(
+    Numba n'est importé qu'ici, au premier sous-échantillonnage, et non au
+    démarrage de l'application.
     """
-    # :earth_americas: Tableau de bord de la croissance du PIB mondial
-    **Créé par RENE TOLNO**
+    try:
+        from numba import njit
+    except ImportError:  # Numba est optionnel : LTTB reste alors en NumPy
+        return lttb_indices
+    return njit(cache=True, fastmath=True)(lttb_indices)
 
-Plongez dans l'analyse des données du PIB grâce aux données ouvertes de la [Banque Mondiale](https://data.worldbank.org/). Cette application, conçue avec une approche basée sur la science des données, permet d'explorer et de visualiser les tendances économiques mondiales.
+def to_chart_data(pivot_data, max_points=MAX_CHART_POINTS):
+    """
+    Passe le tableau croisé (index = Année, colonnes = Country Code) au format
+    long attendu par Vega-Lite, en sous-échantillonnant chaque série par LTTB
+    lorsqu'elle dépasse max_points.
 
-Les principales Fonctionnalités :
+    Le code pays est catégoriel : Streamlit transmet les données du graphique
+    en Arrow, où cette colonne est alors encodée par dictionnaire.
+    """
+    country_dtype = pd.CategoricalDtype(pivot_data.columns)
+    n_years, n_countries = pivot_data.shape
+    if n_years <= max_points:
+        return pd.DataFrame({
+            "Année": np.tile(pivot_data.index.to_numpy(), n_countries),
+            "Country Code": pd.Categorical.from_codes(
+                np.repeat(np.arange(n_countries), n_years), dtype=country_dtype
+            ),
+            "PIB": pivot_data.to_numpy().ravel(order="F"),
+        })
+
+    lttb = get_lttb_kernel()
+    x = pivot_data.index.to_numpy(dtype=np.float64)
+    frames = []
+    for country in pivot_data.columns:
+        y = pivot_data[country].to_numpy(dtype=np.float64)
+        valid = np.flatnonzero(~np.isnan(y))
+        kept = valid[lttb(x[valid], y[valid], max_points)]
+        frames.append(pd.DataFrame({"Année": pivot_data.index[kept], "Country Code": country, "PIB": y[kept]}))
+    return pd.concat(frames, ignore_index=True).astype({"Country Code": country_dtype})
+
+@st.cache_data(show_spinner=False)
+def to_csv_bytes(_df_filtre, from_year, to_year, countries):
+    """
+    Sérialise en CSV (UTF-8) les données filtrées pour le téléchargement.
 
-✅ Sélection dynamique de la plage d’années selon les données disponibles.
+    L'écriture passe par le sérialiseur CSV d'Arrow (en C++, multi-thread).
+    Le résultat est mis en cache selon la sélection (années, pays) : le
+    tableau lui-même, préfixé par « _ », n'est pas haché par Streamlit.
+    """
+    buffer = pa.BufferOutputStream()
+    pacsv.write_csv(pa.Table.from_pandas(_df_filtre, preserve_index=False), buffer)
+    return buffer.getvalue().to_pybytes()
 
-✅ Choix des pays à comparer pour une analyse ciblée.
+def filter_gdp_data(df_pib, code_to_row, from_year, to_year, countries):
+    """
+    Sélectionne dans le tableau long les lignes des pays et de la période choisis.
 
-✅ Personnalisation avancée des graphiques : affichage en valeur absolue ou en indice (base 100).
+    Chaque pays occupe un bloc contigu de lignes triées par année : les bornes
+    d'années sont cherchées par dichotomie dans le bloc d'un pays, puis
+    appliquées au bloc de chaque pays sélectionné (sans masque booléen).
+    """
+    n_years = len(df_pib) // len(code_to_row)
+    year_axis = df_pib["Année"].to_numpy()[:n_years]
+    lo = np.searchsorted(year_axis, from_year, side="left")
+    hi = np.searchsorted(year_axis, to_year, side="right")
+    starts = np.array([code_to_row[country] for country in countries], dtype=np.intp) * n_years
+    return df_pib.iloc[(starts[:, None] + np.arange(lo, hi)).ravel()]
+
+def compute_cagr(first_values, last_values, n_years):
+    """
+    Calcule en une fois le taux de croissance annuel moyen (CAGR) de plusieurs pays.
 
-✅ Indicateurs clés : PIB en milliards de dollars et taux de croissance annuel moyen (CAGR).
+    Le calcul se fait en float64, sous la forme expm1(log(fin / début) / n),
+    plus précise que la puissance pour les faibles taux. Renvoie NaN lorsque
+    le CAGR n'est pas calculable (valeur manquante, base nulle, période vide).
+    """
+    first_values = np.asarray(first_values, dtype=np.float64)
+    last_values = np.asarray(last_values, dtype=np.float64)
+    if n_years <= 0:
+        return np.full(first_values.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = last_values / first_values
+        return np.where(first_values != 0, np.expm1(np.log(growth) / n_years), np.nan)
+
+@st.cache_data(show_spinner=False)
+def compute_rankings(_df_pib, from_year, to_year):
+    """
+    Calcule le top 10 des pays par PIB pour chaque année de la période.
 
-Idéal pour les économistes, analystes et passionnés de data science souhaitant extraire des insights pertinents sur l’évolution économique mondiale. 🚀📊
+    Un seul tri est fait sur la période, suivi d'un groupby par année. Le
+    résultat est mis en cache selon la période ; le tableau, préfixé par « _ »,
+    n'est pas haché par Streamlit.
+    """
+    period_df = _df_pib[_df_pib["Année"].between(from_year, to_year)]
+    return (
+        period_df.sort_values(["Année", "PIB"], ascending=[True, False])
+        .groupby("Année", sort=False)
+        .head(10)
+    )
 
-**Copyright 2025** - Données de la Banque Mondiale
+@st.cache_data(show_spinner=False)
+def continent_series(_wide_df, continents):
     """
-)
+    Calcule une fois pour toutes le PIB total de chaque continent par année
+    (index = Année, colonnes = Continent), à partir du tableau large.
+
+    Le tableau large, préfixé par « _ », n'est pas haché ; les continents le
+    sont (une valeur par pays), pour que le cache suive CONTINENT_MAP.
+    """
+    return _wide_df.T.groupby(continents, observed=True).sum().T
+
+df_pib, pib_matrix, code_to_row, min_year, max_year, wide_df, countries_dict, continents = get_gdp_data(CONTINENT_MAP)
+
+# -----------------------------------------------------------------------------
+# Titre et description de l'application
+
+st.markdown(DESCRIPTION_MD)
 
 st.write("")
 st.write("")
@@ -92,19 +368,15 @@ st.write("")
 # -----------------------------------------------------------------------------
 # Sélection de la plage d'années et des pays
 
-min_year_data = int(df_pib["Année"].min())
-max_year_data = int(df_pib["Année"].max())
-
 from_year, to_year = st.slider(
     "Sélectionnez la plage d'années :",
-    min_value=min_year_data,
-    max_value=max_year_data,
-    value=(min_year_data, max_year_data)
+    min_value=min_year,
+    max_value=max_year,
+    value=(min_year, max_year)
 )
 
 # Liste des pays et noms pour l'affichage dans le sélecteur
-countries_dict = {country: name for country, name in zip(df_pib["Country Code"].unique(), df_pib["Country Name"].unique())}
-countries = list(countries_dict.keys())
+countries = df_pib["Country Code"].cat.categories.tolist()
 
 selected_countries = st.multiselect(
     "Sélectionnez les pays à afficher :",
@@ -116,149 +388,147 @@ selected_countries = st.multiselect(
 st.write("")
 
 # -----------------------------------------------------------------------------
-# Options supplémentaires pour le graphique
-
-type_graphique = st.radio(
-    "Choisissez le type de graphique :",
-    options=["Ligne", "Barres"]
-)
-
-mode_affichage = st.radio(
-    "Mode d'affichage du graphique :",
-    options=["Valeur absolue", "Indice (base 100)"]
-)
-
-# Filtrage des données en fonction des sélections
-df_filtre = df_pib[
-    (df_pib["Country Code"].isin(selected_countries)) &
-    (df_pib["Année"] >= from_year) &
-    (df_pib["Année"] <= to_year)
-]
-
-# -----------------------------------------------------------------------------
-# Organisation de l'application en onglets
-
-tabs = st.tabs(["Graphique", "Indicateurs", "Données brutes", "À propos"])
+# Contenu des onglets
+#
+# Chaque onglet est un fragment : un widget propre à l'onglet (type de
+# graphique, téléchargement...) ne réexécute que cet onglet, pas tout le script.
 
 # Onglet Graphique
-with tabs[0]:
+@st.fragment
+def render_graph(from_year, to_year, selected_countries):
     st.header("Évolution du PIB")
+
+    # Options supplémentaires pour le graphique
+    type_graphique = st.radio(
+        "Choisissez le type de graphique :",
+        options=["Ligne", "Barres"]
+    )
+
+    mode_affichage = st.radio(
+        "Mode d'affichage du graphique :",
+        options=["Valeur absolue", "Indice (base 100)"]
+    )
     
-    # Création d'un tableau croisé : index = Année, colonnes = Country Code
-    pivot_data = df_filtre.pivot(index="Année", columns="Country Code", values="PIB")
+    # Tableau croisé : index = Année, colonnes = Country Code
+    pivot_data = wide_df.loc[from_year:to_year, selected_countries]
     
     # Transformation en indice si sélectionné
     if mode_affichage == "Indice (base 100)":
-        pivot_data_index = pivot_data.copy()
-        for country in pivot_data_index.columns:
-            if from_year in pivot_data_index.index:
-                base_val = pivot_data_index.loc[from_year, country]
-                if base_val and not pd.isna(base_val) and base_val != 0:
-                    pivot_data_index[country] = pivot_data_index[country] / base_val * 100
-        pivot_data = pivot_data_index
+        # Division vectorisée par la ligne de l'année de base (une base nulle
+        # ou manquante donne NaN pour le pays concerné). Le facteur 100 est
+        # appliqué à la base : un seul tableau est alloué, sans copie préalable.
+        if from_year in pivot_data.index:
+            base = pivot_data.loc[from_year].replace(0, np.nan)
+            pivot_data = pivot_data.div(base / 100, axis="columns")
         st.caption("Les valeurs sont exprimées en indice (base 100 = valeur en {0}).".format(from_year))
     
-    # Affichage du graphique
+    # Affichage du graphique avec une spécification Vega-Lite écrite à la main
+    # (format long, séries longues sous-échantillonnées pour le mode ligne)
     if type_graphique == "Ligne":
-        st.line_chart(pivot_data)
+        chart_data = to_chart_data(pivot_data)
+        spec = {
+            "mark": "line",
+            "encoding": {
+                "x": {"field": "Année", "type": "quantitative", "axis": {"format": "d"}},
+                "y": {"field": "PIB", "type": "quantitative"},
+                "color": {"field": "Country Code", "type": "nominal"},
+            },
+        }
     else:
-        st.bar_chart(pivot_data)
+        chart_data = to_chart_data(pivot_data, max_points=len(pivot_data))
+        spec = {
+            "mark": "bar",
+            "encoding": {
+                "x": {"field": "Année", "type": "ordinal"},
+                "y": {"field": "PIB", "type": "quantitative", "aggregate": "sum"},
+                "color": {"field": "Country Code", "type": "nominal"},
+            },
+        }
+    spec["width"] = "container"
+    st.vega_lite_chart(chart_data, spec)
 
 # Onglet Indicateurs
-with tabs[1]:
+@st.fragment
+def render_indicators(from_year, to_year, selected_countries):
     st.header(f"Indicateurs pour l'année {to_year}")
-    
-    # Affichage du PIB (en milliards de dollars) et de la croissance totale
-    st.subheader("PIB et croissance totale")
-    cols = st.columns(4)
-    for i, country in enumerate(selected_countries):
-        with cols[i % 4]:
-            try:
-                first_pib = df_pib[(df_pib["Country Code"] == country) & (df_pib["Année"] == from_year)]["PIB"].iat[0]
-                last_pib = df_pib[(df_pib["Country Code"] == country) & (df_pib["Année"] == to_year)]["PIB"].iat[0]
-            except IndexError:
-                first_pib = float("nan")
-                last_pib = float("nan")
-            
-            first_pib_b = first_pib / 1e9 if not pd.isna(first_pib) else float("nan")
-            last_pib_b = last_pib / 1e9 if not pd.isna(last_pib) else float("nan")
-            
-            if pd.isna(first_pib_b) or first_pib_b == 0 or from_year == to_year:
-                croissance = "n/a"
-                delta_color = "off"
-            else:
-                croissance = f"{(last_pib_b / first_pib_b):,.2f}x"
-                delta_color = "normal"
-            
-            st.metric(
-                label=f"PIB de {country}",
-                value=f"${last_pib_b:,.0f} Mds",
-                delta=croissance,
-                delta_color=delta_color
-            )
-    
-    st.write("")
-    # Calcul et affichage du CAGR (taux de croissance annuel moyen)
-    st.subheader("Croissance annuelle moyenne (CAGR)")
-    cols_cagr = st.columns(4)
-    for i, country in enumerate(selected_countries):
-        with cols_cagr[i % 4]:
-            try:
-                first_val = df_pib[(df_pib["Country Code"] == country) & (df_pib["Année"] == from_year)]["PIB"].iat[0]
-                last_val = df_pib[(df_pib["Country Code"] == country) & (df_pib["Année"] == to_year)]["PIB"].iat[0]
-            except IndexError:
-                first_val = float("nan")
-                last_val = float("nan")
-            
-            if pd.isna(first_val) or first_val == 0 or from_year == to_year:
-                cagr = "n/a"
-            else:
-                cagr_value = (last_val / first_val) ** (1 / (to_year - from_year)) - 1
-                cagr = f"{cagr_value * 100:.2f}%"
-            
-            st.metric(
-                label=f"CAGR {country}",
-                value=cagr
-            )
+
+    # PIB de début et de fin de période des pays sélectionnés, extraits une
+    # seule fois pour tous les indicateurs
+    selected_rows = [code_to_row[country] for country in selected_countries]
+    first_pibs = pib_matrix[selected_rows, from_year - min_year]
+    last_pibs = pib_matrix[selected_rows, to_year - min_year]
+
+    # PIB (en milliards de dollars), croissance totale et CAGR (taux de
+    # croissance annuel moyen) de tous les pays dans un seul tableau
+    st.subheader("PIB, croissance totale et CAGR")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = np.where((first_pibs != 0) & (from_year != to_year), last_pibs / first_pibs, np.nan)
+    cagr_values = compute_cagr(first_pibs, last_pibs, to_year - from_year)
+
+    metrics_df = pd.DataFrame({
+        "Pays": selected_countries,
+        "Nom": [countries_dict[country] for country in selected_countries],
+        "PIB (Mds $)": last_pibs / 1e9,
+        "Croissance": growth,
+        "CAGR": cagr_values * 100,
+    })
+    # Valeurs numériques (le tableau reste triable par colonne), mises en
+    # forme uniquement à l'affichage
+    st.dataframe(
+        metrics_df.style.format(
+            {"PIB (Mds $)": "${:,.0f}", "Croissance": "{:,.2f}x", "CAGR": "{:.2f}%"}, na_rep="n/a"
+        ),
+        hide_index=True,
+    )
 
     # Classement par pays pour chaque année
     st.subheader("Classement des pays par PIB (tous les pays)")
-    for year in range(from_year, to_year + 1):
-        ranking_df = df_pib[df_pib["Année"] == year].sort_values("PIB", ascending=False)
-        st.subheader(f"Classement des pays pour l'année {year}")
-        st.dataframe(ranking_df[["Country Code", "Country Name", "PIB"]].head(10))  # Afficher le top 10 des pays
+    top10_df = compute_rankings(df_pib, from_year, to_year)
+    # Un seul classement affiché à la fois (par défaut la dernière année)
+    ranking_years = list(range(from_year, to_year + 1))
+    year = st.selectbox("Classement pour l'année :", ranking_years, index=len(ranking_years) - 1)
+    ranking_df = top10_df[top10_df["Année"] == year]
+    st.subheader(f"Classement des pays pour l'année {year}")
+    st.dataframe(ranking_df[["Country Code", "Country Name", "PIB"]])  # Afficher le top 10 des pays
 
     # Classement par continent pour chaque année
     st.subheader(f"Classement par continent en {to_year}")
-    continent_rank = df_pib[df_pib["Année"] == to_year].groupby("Continent")["PIB"].sum().sort_values(ascending=False)
+    continent_rank = continent_series(wide_df, continents).loc[to_year].rename("PIB").sort_values(ascending=False)
     st.dataframe(continent_rank)
 
 # Onglet Données brutes
-with tabs[2]:
+@st.fragment
+def render_raw_data(from_year, to_year, selected_countries):
     st.header("Données brutes")
-    st.dataframe(df_filtre)
-    csv = df_filtre.to_csv(index=False).encode("utf-8")
-    st.download_button("Télécharger les données", data=csv, file_name="donnees_pib.csv", mime="text/csv")
+    # st.tabs exécute tous les onglets à chaque interaction : le tableau long
+    # filtré et le fichier CSV ne sont construits qu'à la demande
+    show_table = st.checkbox("Afficher les données filtrées")
+    prepare_csv = st.checkbox("Préparer le fichier CSV à télécharger")
+    if not (show_table or prepare_csv):
+        return
+
+    df_filtre = filter_gdp_data(df_pib, code_to_row, from_year, to_year, selected_countries)
+    if show_table:
+        st.dataframe(df_filtre)
+    if prepare_csv:
+        csv = to_csv_bytes(df_filtre, from_year, to_year, tuple(selected_countries))
+        st.download_button("Télécharger les données", data=csv, file_name="donnees_pib.csv", mime="text/csv")
 
-# Onglet À propos
-with tabs[3]:
-    st.header("À propos")
-    st.markdown(
-        """
-        **Tableau de bord du PIB**  
-        Créé par **RENE TOLNO**
+# -----------------------------------------------------------------------------
+# Organisation de l'application en onglets
 
-        Cette application permet d'explorer les données du PIB issues du [World Bank Open Data](https://data.worldbank.org/).  
-        Vous pouvez :
-        - Sélectionner la plage d'années (déduite automatiquement des données disponibles).
-        - Choisir les pays à afficher.
-        - Personnaliser l'affichage du graphique (type et mode : valeur absolue ou indice avec base 100).
-        - Visualiser des indicateurs de performance, notamment le PIB en dollars et le taux de croissance annuel moyen (CAGR).
+tabs = st.tabs(["Graphique", "Indicateurs", "Données brutes", "À propos"])
 
-        **Notes** :  
-        - Les montants sont affichés en dollars américains.  
-        - Les valeurs du PIB sont converties en milliards pour une lecture simplifiée.
+with tabs[0]:
+    render_graph(from_year, to_year, selected_countries)
 
-        **Tous droits reservés** - Données de la Banque Mondiale
-        """
-    )
+with tabs[1]:
+    render_indicators(from_year, to_year, selected_countries)
+
+with tabs[2]:
+    render_raw_data(from_year, to_year, selected_countries)
+
+# Onglet À propos (contenu statique, sans widget)
+with tabs[3]:
+    st.header("À propos")
+    st.markdown(ABOUT_MD)